@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+from scipy import sparse
+import threading
+import time
+from jinja2 import Template
+
+from scoring import topk_csr, warm_up
 
 # ---------------------------------------------------
 # PAGE CONFIG
@@ -15,80 +18,135 @@ st.set_page_config(
 )
 
 
+# Columns shown on every course card, in the order recommend returns them
+CARD_FIELDS = ("name", "url", "poster", "description_short", "provider")
+
+
 # ---------------------------------------------------
 # LOAD REAL COURSERA DATA ONLY
 # ---------------------------------------------------
-@st.cache_data
+@st.cache_resource
 def load_data():
     """Load real Coursera data - NO FALLBACK"""
     try:
-        df = pickle.load(open("course.pkl", "rb"))
-        return df
+        df = pd.read_feather("course.feather")
     except Exception as e:
         st.error(f"❌ Error loading course data: {str(e)}")
         st.stop()  # Stop the app if data fails
 
+    # Fill display fallbacks once so rendering needs no per-row checks
+    if 'description' not in df.columns:
+        df['description'] = "Explore this course!"
+    else:
+        df['description'] = df['description'].fillna("Explore this course!")
+    if 'provider' not in df.columns:
+        df['provider'] = "Coursera"
+    else:
+        df['provider'] = df['provider'].fillna("Coursera")
+    df['description_short'] = df['description'].str.slice(0, 100) + "..."
+
+    # Every card field must exist, otherwise the first render fails mid-page
+    missing = [field for field in CARD_FIELDS if field not in df.columns]
+    if missing:
+        st.error(f"❌ course.feather is missing columns: {', '.join(missing)}")
+        st.stop()
+    return df
+
+
+# The leading underscore on _df tells Streamlit not to hash the DataFrame on
+# every call; load_data() returns the same cached object for the process
+@st.cache_resource
+def load_arrays(_df):
+    """Extract the columns shown on course cards as plain NumPy arrays"""
+    return {field: _df[field].to_numpy() for field in CARD_FIELDS}
+
+
+@st.cache_resource
+def build_name_index(_df):
+    """Map each course name to the position of its first occurrence"""
+    name_to_idx = {}
+    for i, name in enumerate(_df['name'].to_numpy()):
+        name_to_idx.setdefault(name, i)
+    return name_to_idx
+
+
+@st.cache_resource
+def course_names(_df):
+    """Unique course names offered in the course picker, alphabetically"""
+    return tuple(sorted(_df['name'].unique()))
+
+
+# How long a session keeps its trending picks before they are reshuffled
+TRENDING_REFRESH_SECONDS = 300
+
+
+def trending_indices(n, k=6):
+    """Pick a random sample of courses to feature as trending"""
+    return np.random.default_rng().choice(n, size=min(k, n), replace=False)
+
 
 # ---------------------------------------------------
-# COMPUTE SIMILARITY WITH REAL DATA
+# LOAD PRECOMPUTED TF-IDF INDEX
 # ---------------------------------------------------
-@st.cache_data
-def compute_similarity(df):
-    """Compute similarity matrix using course content"""
-    # Combine relevant features for better recommendations
-    if 'description' in df.columns:
-        features = df['name'] + " " + df['description']
-    else:
-        features = df['name']
+@st.cache_resource
+def load_index(n_courses):
+    """Load the L2-normalized TF-IDF matrix written by build_index.py"""
+    try:
+        tfidf_matrix = sparse.load_npz("tfidf.npz").tocsr()
+    except Exception as e:
+        st.error(f"❌ Error loading TF-IDF index: {str(e)}")
+        st.stop()  # Stop the app if the index fails
 
-    # Create TF-IDF Vectorizer
-    tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
-    tfidf_matrix = tfidf.fit_transform(features)
+    # Rows must line up with course.feather, otherwise every lookup is wrong
+    if tfidf_matrix.shape[0] != n_courses:
+        st.error("❌ tfidf.npz does not match course.feather - rerun build_index.py")
+        st.stop()
+    return tfidf_matrix
 
-    # Compute cosine similarity
-    similarity = cosine_similarity(tfidf_matrix, tfidf_matrix)
-    return similarity
+
+# Compile (or load from numba's on-disk cache) the scoring kernel once per
+# process in the background, so neither first paint nor the first click waits
+@st.cache_resource
+def start_kernel_warm_up():
+    """Launch topk_csr compilation on a daemon thread"""
+    threading.Thread(target=warm_up, daemon=True).start()
 
 
 # ---------------------------------------------------
 # RECOMMENDATION FUNCTION
 # ---------------------------------------------------
-def recommend(course_name, df, similarity, n_recommendations=6):
-    """Get course recommendations based on similarity"""
+def recommend(course_name, name_to_idx, tfidf_matrix, columns, n_recommendations=6):
+    """Get course recommendations as aligned CARD_FIELDS arrays plus scores"""
     try:
-        if course_name not in df['name'].values:
-            return []
-
-        idx = df[df['name'] == course_name].index[0]
-        scores = similarity[idx]
-
-        # Get top similar courses (excluding the course itself)
-        similar_indices = scores.argsort()[::-1][1:n_recommendations + 1]
-
-        results = []
-        for i in similar_indices:
-            if i < len(df):
-                course_data = {
-                    "name": df.iloc[i]["name"],
-                    "url": df.iloc[i]["url"],
-                    "poster": df.iloc[i]["poster"],
-                    "description": df.iloc[i].get("description", "Explore this course!"),
-                    "provider": df.iloc[i].get("provider", "Coursera"),
-                    "similarity_score": f"{scores[i]:.2f}"
-                }
-                results.append(course_data)
-
-        return results
+        idx = name_to_idx.get(course_name)
+        if idx is None:
+            return ()
+
+        # Rows are L2-normalized, so dot products with the selected row are
+        # cosine similarities; the kernel scores and selects in one pass
+        k = min(n_recommendations, tfidf_matrix.shape[0] - 1)
+        if k < 1:
+            return ()  # a one-course catalogue has nothing to recommend
+        similar_indices, scores = topk_csr(
+            tfidf_matrix.indptr, tfidf_matrix.indices, tfidf_matrix.data,
+            tfidf_matrix.shape[1], idx, k
+        )
+
+        # One array per card field, best match first
+        fields = tuple(columns[field][similar_indices] for field in CARD_FIELDS)
+        return fields + (scores,)
 
     except Exception as e:
         st.error(f"Error generating recommendations: {str(e)}")
-        return []
+        return ()
 
 
 # ---------------------------------------------------
 # STYLING
 # ---------------------------------------------------
-st.markdown("""
+# Streamlit drops any element a rerun does not emit again, so the stylesheet
+# is sent on every run; its whitespace is collapsed once at import instead
+CSS = " ".join("""
 <style>
     .stApp {
         background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
@@ -168,14 +226,61 @@ st.markdown("""
         margin-bottom: 30px;
         border: 1px solid rgba(255, 255, 255, 0.1);
     }
+    .card-grid {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+        gap: 20px;
+    }
+    @media (max-width: 768px) {
+        .card-grid {
+            grid-template-columns: 1fr;
+        }
+    }
 </style>
-""", unsafe_allow_html=True)
+""".split())
+st.markdown(CSS, unsafe_allow_html=True)
+
+
+# ---------------------------------------------------
+# CARD TEMPLATES
+# ---------------------------------------------------
+# Compiled once at import; each grid renders all of its cards in one call.
+# Autoescaping keeps quotes and ampersands in course names from breaking
+# the surrounding HTML attributes
+RECOMMENDATION_GRID = Template("""<div class='card-grid'>
+{%- for name, url, poster, description, provider, score in cards %}
+<div class='card'>
+    <img src="{{ poster }}" class="thumbnail" alt="{{ name }}" 
+         onerror="this.src='https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg'">
+    <div class="similarity-badge">Match: {{ "%.2f"|format(score) }}</div>
+    <div class="course-title">{{ name }}</div>
+    <div class="course-provider">🏛️ {{ provider }}</div>
+    <div class="course-desc">{{ description }}</div>
+    <a href="{{ url }}" target="_blank" class="btn">Explore Course</a>
+</div>
+{%- endfor %}
+</div>""", autoescape=True)
+
+TRENDING_GRID = Template("""<div class='card-grid'>
+{%- for name, url, poster, description, provider in cards %}
+<div class='card'>
+    <img src="{{ poster }}" class="thumbnail" alt="{{ name }}" 
+         onerror="this.src='https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg'">
+    <div class="course-title">{{ name }}</div>
+    <div class="course-provider">🏛️ {{ provider }}</div>
+    <div class="course-desc">{{ description }}</div>
+    <a href="{{ url }}" target="_blank" class="btn">View Course</a>
+</div>
+{%- endfor %}
+</div>""", autoescape=True)
 
 
 # ---------------------------------------------------
 # MAIN APP
 # ---------------------------------------------------
 def main():
+    start_kernel_warm_up()
+
     # Header
     st.markdown("""
     <div class="header">
@@ -186,7 +291,8 @@ def main():
 
     # Load REAL data only
     df = load_data()
-    similarity = compute_similarity(df)
+    columns = load_arrays(df)
+    name_to_idx = build_name_index(df)
 
     # Course selection
     st.markdown("---")
@@ -195,7 +301,7 @@ def main():
     with col1:
         selected_course = st.selectbox(
             "🔍 **Select a course to get personalized recommendations:**",
-            df['name'].unique(),
+            course_names(df),
             help="Choose from 5411 real Coursera courses"
         )
 
@@ -205,38 +311,36 @@ def main():
 
     # Display selected course info
     if selected_course:
-        selected_info = df[df['name'] == selected_course].iloc[0]
+        selected_info = df.iloc[name_to_idx[selected_course]]
         st.markdown(f"""
         <div style="background: rgba(74, 144, 226, 0.1); padding: 20px; border-radius: 10px; border-left: 4px solid #4A90E2; margin: 20px 0;">
             <h4 style="margin:0 0 8px 0; color:white;">📚 {selected_info['name']}</h4>
-            <p style="margin:0; color:#94a3b8; font-size:14px;">{selected_info.get('description', 'Popular course among learners worldwide')}</p>
+            <p style="margin:0; color:#94a3b8; font-size:14px;">{selected_info['description']}</p>
         </div>
         """, unsafe_allow_html=True)
 
     # Recommendations
     if recommend_clicked:
-        with st.spinner("🤖 Finding the perfect courses for you..."):
-            recommendations = recommend(selected_course, df, similarity, 6)
+        # Re-clicking the same course reuses this session's earlier result
+        cache_key = ("rec", selected_course)
+        if cache_key in st.session_state:
+            recommendations = st.session_state[cache_key]
+        else:
+            with st.spinner("🤖 Finding the perfect courses for you..."):
+                # Loaded lazily so page views that never ask for
+                # recommendations don't wait on the index
+                tfidf_matrix = load_index(len(df))
+                recommendations = recommend(selected_course, name_to_idx, tfidf_matrix, columns, 6)
+            if recommendations:
+                st.session_state[cache_key] = recommendations
 
         if recommendations:
             st.markdown("### 🎯 Recommended For You")
             st.write("Based on your selection, here are courses you might like:")
 
-            # Display recommendations in a grid
-            cols = st.columns(3)
-            for i, rec in enumerate(recommendations):
-                with cols[i % 3]:
-                    st.markdown(f"""
-                    <div class='card'>
-                        <img src="{rec['poster']}" class="thumbnail" alt="{rec['name']}" 
-                             onerror="this.src='https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg'">
-                        <div class="similarity-badge">Match: {rec['similarity_score']}</div>
-                        <div class="course-title">{rec['name']}</div>
-                        <div class="course-provider">🏛️ {rec['provider']}</div>
-                        <div class="course-desc">{rec['description'][:100]}...</div>
-                        <a href="{rec['url']}" target="_blank" class="btn">Explore Course</a>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # Display recommendations in a grid, sent as a single element
+            st.markdown(RECOMMENDATION_GRID.render(cards=zip(*recommendations)),
+                        unsafe_allow_html=True)
         else:
             st.warning("No recommendations found. Please try selecting a different course.")
 
@@ -244,22 +348,17 @@ def main():
     st.markdown("---")
     st.markdown("### 🔥 Trending Courses")
 
-    # Get trending courses from real data
-    trending_courses = df.sample(min(6, len(df)))
-
-    cols = st.columns(3)
-    for i, (_, row) in enumerate(trending_courses.iterrows()):
-        with cols[i % 3]:
-            st.markdown(f"""
-            <div class='card'>
-                <img src="{row['poster']}" class="thumbnail" alt="{row['name']}" 
-                     onerror="this.src='https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg'">
-                <div class="course-title">{row['name']}</div>
-                <div class="course-provider">🏛️ {row.get('provider', 'Coursera')}</div>
-                <div class="course-desc">{row.get('description', 'Popular course among learners')[:100]}...</div>
-                <a href="{row['url']}" target="_blank" class="btn">View Course</a>
-            </div>
-            """, unsafe_allow_html=True)
+    # Get trending courses from real data, kept per session so reruns
+    # don't reshuffle them
+    now = time.time()
+    if ("trending" not in st.session_state
+            or now - st.session_state.trending_t > TRENDING_REFRESH_SECONDS):
+        st.session_state.trending = trending_indices(len(df))
+        st.session_state.trending_t = now
+    trending = st.session_state.trending
+
+    trending_fields = (columns[field][trending] for field in CARD_FIELDS)
+    st.markdown(TRENDING_GRID.render(cards=zip(*trending_fields)), unsafe_allow_html=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
+
+COURSE_FILE = "course.feather"
+INDEX_FILE = "tfidf.npz"
+TRANSFORMER_FILE = "tfidf_transformer.pkl"
+
+
+# ---------------------------------------------------
+# BUILD THE TF-IDF INDEX (run offline, after course.feather changes)
+# ---------------------------------------------------
+def course_features(df):
+    """Text each course is indexed by, one document per row"""
+    # Combine relevant features for better recommendations
+    # (streamed to the vectorizer without building a joined string Series)
+    names = df['name'].to_numpy()
+    if 'description' in df.columns:
+        return (f"{n} {d}" for n, d in zip(names, df['description'].to_numpy()))
+    return names
+
+
+def build_index(df):
+    """Fit the TF-IDF model and return it with the L2-normalized matrix"""
+    # Hash terms straight into columns (no vocabulary to build), then
+    # re-weight the counts with TF-IDF. The app relies on the rows being
+    # unit length, so cosine similarity never has to re-normalize them
+    model = make_pipeline(
+        HashingVectorizer(stop_words='english', n_features=2 ** 14,
+                          alternate_sign=False, norm=None, dtype=np.float32),
+        TfidfTransformer(norm='l2', sublinear_tf=True),
+    )
+    tfidf_matrix = model.fit_transform(course_features(df))
+
+    # Canonical CSR (sorted, duplicate-free column indices per row) keeps
+    # scipy's sparse products on their fast path
+    tfidf_matrix.sum_duplicates()
+
+    # float32 values (set on the hasher) and int32 indices keep the bytes the
+    # app's sparse product streams per non-zero to a minimum
+    tfidf_matrix.indices = tfidf_matrix.indices.astype(np.int32, copy=False)
+    tfidf_matrix.indptr = tfidf_matrix.indptr.astype(np.int32, copy=False)
+    return model, tfidf_matrix
+
+
+def main():
+    df = pd.read_feather(COURSE_FILE)
+    model, tfidf_matrix = build_index(df)
+
+    # The hasher is stateless, so only the fitted IDF weights need saving
+    sparse.save_npz(INDEX_FILE, tfidf_matrix)
+    with open(TRANSFORMER_FILE, "wb") as f:
+        pickle.dump(model[-1], f)
+
+    print(f"✅ Indexed {tfidf_matrix.shape[0]} courses "
+          f"({tfidf_matrix.nnz} non-zeros) into {INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
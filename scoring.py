@@ -0,0 +1,45 @@
+import numpy as np
+from numba import njit
+
+
+# ---------------------------------------------------
+# SIMILARITY SCORING KERNELS
+# ---------------------------------------------------
+@njit(cache=True, fastmath=True)
+def topk_csr(indptr, indices, data, n_features, q_idx, k):
+    """Top-k rows most similar to row q_idx of an L2-normalized CSR matrix"""
+    # Numba doesn't bounds-check, so k < 1 must not reach the top-k buffers
+    if k < 1:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    # Scatter the query row into a dense buffer so each dot product is a gather
+    query = np.zeros(n_features, dtype=np.float32)
+    for p in range(indptr[q_idx], indptr[q_idx + 1]):
+        query[indices[p]] = data[p]
+
+    # Running top-k; cosine scores of TF-IDF rows are never below zero
+    best_idx = np.full(k, -1, dtype=np.int32)
+    best_scores = np.full(k, -1.0, dtype=np.float32)
+    worst = 0
+    for r in range(indptr.shape[0] - 1):
+        if r == q_idx:
+            continue  # never recommend the course itself
+        dot = np.float32(0.0)
+        for p in range(indptr[r], indptr[r + 1]):
+            dot += data[p] * query[indices[p]]
+        if dot > best_scores[worst]:
+            best_idx[worst] = r
+            best_scores[worst] = dot
+            worst = np.argmin(best_scores)
+
+    # Best match first
+    order = np.argsort(-best_scores)
+    return best_idx[order], best_scores[order]
+
+
+def warm_up():
+    """Compile topk_csr for the index's argument types on a tiny matrix"""
+    indptr = np.array([0, 1, 2], dtype=np.int32)
+    indices = np.array([0, 0], dtype=np.int32)
+    data = np.ones(2, dtype=np.float32)
+    topk_csr(indptr, indices, data, 1, 0, 1)